@@ -1,18 +1,34 @@
 """The pioneer component."""
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TIMEOUT, Platform
 from homeassistant.core import HomeAssistant
 
+from .connection import PioneerConnection
+from .const import DOMAIN
+
 PLATFORMS = [Platform.MEDIA_PLAYER]
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up Pioneer integration from a config entry."""
+    host, port = config_entry.data[CONF_HOST], config_entry.data[CONF_PORT]
+    # All zones of the receiver share this one connection
+    hass.data.setdefault(DOMAIN, {})[(host, port)] = PioneerConnection(
+        hass, host, port, config_entry.data[CONF_TIMEOUT]
+    )
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        config_entry, PLATFORMS
+    )
+    if unload_ok:
+        connection = hass.data[DOMAIN].pop(
+            (config_entry.data[CONF_HOST], config_entry.data[CONF_PORT])
+        )
+        await connection.async_close()
+    return unload_ok
@@ -0,0 +1,288 @@
+"""Connection to a Pioneer AVR shared by all of its zones."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+import socket
+
+from homeassistant.core import HomeAssistant
+
+from .const import MAX_SOURCE_NUMBERS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for each expected response line
+RESPONSE_TIMEOUT = 0.2
+READ_SIZE = 1024
+# Discovery stops after this many consecutive waits see no source name
+SOURCE_DISCOVERY_MISSES = 2
+SOURCE_DISCOVERY_QUERIES = b"".join(
+    f"?RGB{i:02d}\r".encode("ASCII") for i in range(MAX_SOURCE_NUMBERS)
+)
+
+
+class PioneerConnection:
+    """A single TCP session to a Pioneer AVR, multiplexed across zones.
+
+    A background task reads every line the receiver sends and hands it to the
+    listeners registered for its prefix, so state changes made at the unit
+    itself are picked up as soon as they are announced.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, host: str, port: int, timeout: float
+    ) -> None:
+        """Initialize the connection."""
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._listeners: dict[bytes, list[Callable[[bytes], None]]] = {}
+        self._waiters: dict[bytes, list[asyncio.Future[bytes]]] = {}
+        self._prefixes: list[bytes] | None = None
+        self._queued: list[tuple[dict[bytes, bytes], asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._discovery_task: asyncio.Task[dict[str, str]] | None = None
+        self._sources: dict[str, str] = {}
+        self._closed = False
+
+    def register_listener(
+        self, prefix: bytes, listener: Callable[[bytes], None]
+    ) -> Callable[[], None]:
+        """Call `listener` with every line starting with `prefix`."""
+        self._listeners.setdefault(prefix, []).append(listener)
+        self._prefixes = None
+
+        def remove_listener() -> None:
+            self._listeners[prefix].remove(listener)
+            if not self._listeners[prefix]:
+                del self._listeners[prefix]
+            self._prefixes = None
+
+        return remove_listener
+
+    def _dispatch(self, line: bytes) -> None:
+        """Hand `line` to the listeners and waiters of its prefix."""
+        if self._prefixes is None:
+            # Longest first so e.g. b"Z2MUT" wins over a shorter match
+            self._prefixes = sorted(
+                self._listeners.keys() | self._waiters.keys(), key=len, reverse=True
+            )
+        for prefix in self._prefixes:
+            if line.startswith(prefix):
+                for listener in list(self._listeners.get(prefix, ())):
+                    try:
+                        listener(line)
+                    except Exception:  # pylint: disable=broad-except
+                        # One bad line must not take down the whole session
+                        _LOGGER.exception("Error handling Pioneer line %r", line)
+                if waiters := self._waiters.pop(prefix, None):
+                    self._prefixes = None
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(line)
+                return
+
+    def _remove_waiter(self, prefix: bytes, waiter: asyncio.Future[bytes]) -> None:
+        """Stop waiting for a response that did not arrive."""
+        waiters = self._waiters.get(prefix)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[prefix]
+                self._prefixes = None
+
+    async def _async_read_loop(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Dispatch every line the receiver sends until the connection drops.
+
+        Lines stay raw bytes; callers decode only what they expose.
+        """
+        buffer = bytearray()
+        try:
+            while data := await reader.read(READ_SIZE):
+                buffer += data
+                start = 0
+                while (end := buffer.find(b"\r\n", start)) != -1:
+                    self._dispatch(bytes(buffer[start:end]))
+                    start = end + 2
+                del buffer[:start]
+        except OSError:
+            pass
+        finally:
+            # Closing the writer makes the next exchange reconnect
+            writer.close()
+
+    async def _async_connect(self) -> asyncio.StreamWriter:
+        """Return the open connection, reconnecting if necessary."""
+        if self._closed:
+            raise ConnectionError("Connection closed")
+        if self._writer is None or self._writer.is_closing():
+            reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), self._timeout
+            )
+            if (sock := self._writer.get_extra_info("socket")) is not None:
+                # Commands are a few bytes and always wait for a reply, so
+                # don't let Nagle hold them back; keepalive spots dead peers
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._read_task = self._hass.async_create_background_task(
+                self._async_read_loop(reader, self._writer),
+                f"pioneer {self._host}:{self._port} reader",
+            )
+        return self._writer
+
+    async def _async_disconnect(self) -> None:
+        """Close the connection if it is open."""
+        writer, self._writer = self._writer, None
+        read_task, self._read_task = self._read_task, None
+        if read_task is not None:
+            read_task.cancel()
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _async_write(self, data: bytes) -> None:
+        """Write `data` to the device, reconnecting once if the link dropped."""
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    writer = await self._async_connect()
+                    writer.write(data)
+                    await writer.drain()
+                    return
+                except (OSError, TimeoutError):
+                    await self._async_disconnect()
+                    if attempt:
+                        raise
+
+    async def async_send(self, command: bytes) -> None:
+        """Send an encoded command to the device."""
+        await self._async_write(command)
+
+    async def async_query(self, commands: dict[bytes, bytes]) -> dict[bytes, bytes]:
+        """Send queries keyed by response prefix and return the responses.
+
+        Queries made by several zones in the same event loop iteration are
+        sent together in one write.
+        """
+        future: asyncio.Future[dict[bytes, bytes]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._queued.append((commands, future))
+        if self._flush_task is None:
+            self._flush_task = self._hass.async_create_task(
+                self._async_flush(), f"pioneer {self._host}:{self._port} query"
+            )
+        return await future
+
+    async def _async_flush(self) -> None:
+        """Send every queued query as one pipelined write and await the replies."""
+        self._flush_task = None
+        batch, self._queued = self._queued, []
+        commands: dict[bytes, bytes] = {}
+        for queued, _ in batch:
+            commands.update(queued)
+
+        loop = asyncio.get_running_loop()
+        waiters: dict[bytes, asyncio.Future[bytes]] = {}
+        for prefix in commands:
+            waiters[prefix] = loop.create_future()
+            self._waiters.setdefault(prefix, []).append(waiters[prefix])
+        self._prefixes = None
+        try:
+            await self._async_write(b"".join(commands.values()))
+            await asyncio.wait(
+                waiters.values(), timeout=RESPONSE_TIMEOUT * len(commands)
+            )
+        except (OSError, TimeoutError) as err:
+            self._fail(batch, err)
+            return
+        except asyncio.CancelledError:
+            self._fail(batch, ConnectionError("Connection closed"))
+            raise
+        finally:
+            for prefix, waiter in waiters.items():
+                if not waiter.done():
+                    waiter.cancel()
+                    self._remove_waiter(prefix, waiter)
+
+        results = {
+            prefix: waiter.result()
+            for prefix, waiter in waiters.items()
+            if not waiter.cancelled()
+        }
+        for _, future in batch:
+            if not future.done():
+                future.set_result(results)
+
+    async def async_discover_sources(self) -> dict[str, str]:
+        """Return the source name -> number map reported by the device.
+
+        Discovery runs once per connection; zones asking at the same time
+        share the run and later callers get its result.
+        """
+        if not self._sources and self._discovery_task is None:
+            self._discovery_task = self._hass.async_create_task(
+                self._async_discover(), f"pioneer {self._host}:{self._port} sources"
+            )
+        if self._discovery_task is not None:
+            # Shielded so one caller going away does not cancel the others
+            await asyncio.shield(self._discovery_task)
+        return dict(self._sources)
+
+    async def _async_discover(self) -> dict[str, str]:
+        """Query every source slot in one write and collect the names."""
+        sources: dict[str, str] = {}
+        received = asyncio.Event()
+
+        def add_source(line: bytes) -> None:
+            sources[line[6:].decode("ASCII", "replace")] = line[3:5].decode("ASCII")
+            received.set()
+
+        remove_listener = self.register_listener(b"RGB", add_source)
+        try:
+            await self._async_write(SOURCE_DISCOVERY_QUERIES)
+            misses = 0
+            while misses < SOURCE_DISCOVERY_MISSES:
+                received.clear()
+                try:
+                    await asyncio.wait_for(received.wait(), RESPONSE_TIMEOUT)
+                except TimeoutError:
+                    misses += 1
+                else:
+                    misses = 0
+        finally:
+            remove_listener()
+            self._discovery_task = None
+        self._sources = sources
+        return sources
+
+    @staticmethod
+    def _fail(
+        batch: list[tuple[dict[bytes, bytes], asyncio.Future]], err: Exception
+    ) -> None:
+        """Fail every query in `batch` that has not been answered yet."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(err)
+
+    async def async_close(self) -> None:
+        """Close the connection, failing any query that is still queued."""
+        self._closed = True
+        if self._flush_task is not None:
+            # A flush that never started would leave its callers waiting
+            self._flush_task.cancel()
+            self._flush_task = None
+        queued, self._queued = self._queued, []
+        self._fail(queued, ConnectionError("Connection closed"))
+        async with self._lock:
+            await self._async_disconnect()
@@ -4,6 +4,7 @@ from typing import Final
 DEFAULT_ZONE = 1
 
 CONF_SOURCES = "sources"
+CONF_DISCOVERED_SOURCES = "discovered_sources"
 CONF_ZONES = "zones"
 DOMAIN = "pioneer"
 DEFAULT_NAME = "Pioneer AVR"
@@ -38,6 +39,10 @@ DEFAULT_SOURCES: dict[str, str] = {
     "Favorites": "45",
     "Game": "49",
 }
+# Keyed by the raw number bytes of an FN status line
+DEFAULT_SOURCE_NUMBER_BYTES: dict[bytes, str] = {
+    v.encode("ASCII"): k for k, v in DEFAULT_SOURCES.items()
+}
 
 MAX_VOLUME = 185
 MAX_SOURCE_NUMBERS = 60
@@ -1,9 +1,12 @@
 """Support for Pioneer Network Receivers."""
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime
+from functools import partial
 import logging
-import socket
-import telnetlib
+import time
+from typing import Any
 
 from homeassistant.components.media_player import (
     MediaPlayerDeviceClass,
@@ -12,23 +15,36 @@ from homeassistant.components.media_player import (
     MediaPlayerState,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_TIMEOUT
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
+from .connection import PioneerConnection
 from .const import (
+    CONF_DISCOVERED_SOURCES,
     CONF_SOURCES,
     CONF_ZONES,
+    DEFAULT_SOURCE_NUMBER_BYTES,
     DEFAULT_SOURCES,
     DEFAULT_ZONE,
-    MAX_SOURCE_NUMBERS,
+    DOMAIN,
     MAX_VOLUME,
     ZONE_COMMANDS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds a status response is reused before the device is queried again
+CACHE_TTL = 5.0
+STATUS_QUERIES = ("POWER", "VOL", "MUTE", "SOURCE_NUM")
+# Poll quickly after a change, backing off while the device is idle
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 60.0
+# An update started less than this many seconds ago is shared, not repeated
+UPDATE_SHARE_WINDOW = 1.0
+
 
 async def async_setup_platform(
     hass: HomeAssistant,
@@ -46,24 +62,25 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Pioneer platform."""
+    connection = hass.data[DOMAIN][(entry.data[CONF_HOST], entry.data[CONF_PORT])]
     pioneer = [
         PioneerDevice(
             entry.data[CONF_NAME],
-            entry.data[CONF_HOST],
-            entry.data[CONF_PORT],
-            entry.data[CONF_TIMEOUT],
-            entry.data[CONF_SOURCES],
+            connection,
+            entry.data.get(CONF_SOURCES, []),
             zone,
+            entry,
         )
         for zone in range(1, entry.data[CONF_ZONES] + 1)
     ]
-    async_add_entities(pioneer, True)
+    async_add_entities(pioneer, update_before_add=True)
 
 
 class PioneerDevice(MediaPlayerEntity):
     """Representation of a Pioneer device."""
 
     _attr_device_class = MediaPlayerDeviceClass.RECEIVER
+    _attr_should_poll = False
     _attr_supported_features = (
         MediaPlayerEntityFeature.PAUSE
         | MediaPlayerEntityFeature.VOLUME_SET
@@ -76,125 +93,209 @@ class PioneerDevice(MediaPlayerEntity):
     )
 
     def __init__(
-        self, name, host, port, timeout, sources: list, zone=DEFAULT_ZONE
+        self,
+        name,
+        connection: PioneerConnection,
+        sources: list,
+        zone=DEFAULT_ZONE,
+        entry: ConfigEntry | None = None,
     ) -> None:
         """Initialize the Pioneer device."""
-
-        def filter_sources(pair):
-            key, _ = pair
-            return bool(key in sources)
-
-        source_list = dict(
-            filter(
-                filter_sources,
-                DEFAULT_SOURCES.items(),
-            )
-        )
+        selected = set(sources)
+        source_list = {k: v for k, v in DEFAULT_SOURCES.items() if k in selected}
+        if source_list:
+            # Shared read-only table, unselected sources are filtered on lookup
+            source_number_to_name = DEFAULT_SOURCE_NUMBER_BYTES
+        else:
+            if entry is not None:
+                source_list = dict(entry.data.get(CONF_DISCOVERED_SOURCES, {}))
+            source_number_to_name = {
+                v.encode("ASCII"): k for k, v in source_list.items()
+            }
+        self._entry = entry
         self._name = name
-        self._host = host
-        self._port = port
-        self._timeout = timeout
-        self._pwstate = "PWR1"
-        self._volume = 0
+        self._connection = connection
+        self._pwstate = b"PWR1"
+        self._volume_raw: int | None = 0
         self._muted = False
         self._selected_source = ""
         self._source_name_to_number = source_list
-        self._source_number_to_name = {v: k for k, v in source_list.items()}
+        # Rebuilt only when discovery changes the sources
+        self._source_list = list(source_list)
+        self._source_number_to_name = source_number_to_name
         self._zone = zone
+        # Encoded once so sending a command needs no lookups or encoding
+        self._bcmd = {
+            key: (command["COMMAND"] + "\r").encode("ASCII")
+            for key, command in ZONE_COMMANDS[zone].items()
+            if "COMMAND" in command and key != "MUTED_VALUE"
+        }
+        # MUTED_VALUE is the status line reported while muted, not a command
+        muted_value = ZONE_COMMANDS[zone]["MUTED_VALUE"]["COMMAND"]
+        self._muted_sentinel = muted_value.encode("ASCII")
+        self._field_to_prefix = {
+            key: command["PREFIX"].encode("ASCII")
+            for key, command in ZONE_COMMANDS[zone].items()
+            if "PREFIX" in command
+        }
+        self._appliers = {
+            "POWER": self._apply_pwr,
+            "VOL": self._apply_vol,
+            "MUTE": self._apply_mute,
+            "SOURCE_NUM": self._apply_fn,
+        }
+        self._cache: dict[str, tuple[float, Any]] = {}
+        self._update_lock = asyncio.Lock()
+        self._last_update_ts = 0.0
+        self._poll_interval = MIN_POLL_INTERVAL
+        self._unsub_poll: CALLBACK_TYPE | None = None
+        self._removed = False
 
         self._attr_unique_id = f"pioneer_{zone}"
 
-    @classmethod
-    def telnet_request(cls, telnet, command, expected_prefix) -> None:
-        """Execute `command` and return the response."""
+    async def async_send_command(self, command: bytes) -> bool:
+        """Send command over the shared connection, returning whether it went out."""
+        self._async_schedule_poll(MIN_POLL_INTERVAL)
         try:
-            telnet.write(command.encode("ASCII") + b"\r")
-        except socket.timeout:
-            _LOGGER.debug("Pioneer command %s timed out", command)
-            return None
+            await self._connection.async_send(command)
+        except (OSError, EOFError, TimeoutError):
+            _LOGGER.warning("Pioneer %s command %s failed", self._name, command)
+            return False
+        return True
 
-        # The receiver will randomly send state change updates, make sure
-        # we get the response we are looking for
-        for _ in range(3):
-            result = telnet.read_until(b"\r\n", timeout=0.2).decode("ASCII").strip()
-            if result.startswith(expected_prefix):
-                return result
-        return None
-
-    def telnet_command(self, command) -> None:
-        """Establish a telnet connection and sends command."""
-        try:
-            try:
-                telnet = telnetlib.Telnet(self._host, self._port, self._timeout)
-            except OSError:
-                _LOGGER.warning("Pioneer %s refused connection", self._name)
-                return
-            telnet.write(command.encode("ASCII") + b"\r")
-            telnet.read_very_eager()  # skip response
-            telnet.close()
-        except socket.timeout:
-            _LOGGER.debug("Pioneer %s command %s timed out", self._name, command)
-
-    def update(self) -> None:
+    async def async_update(self) -> None:
         """Get the latest details from the device."""
-        try:
-            telnet = telnetlib.Telnet(self._host, self._port, self._timeout)
-        except OSError:
-            _LOGGER.warning("Pioneer %s refused connection", self._name)
+        if (
+            self._update_lock.locked()
+            and time.monotonic() - self._last_update_ts < UPDATE_SHARE_WINDOW
+        ):
+            # The update already in flight will refresh the same state
             return
-        zone_commands = ZONE_COMMANDS.get(self._zone)
-        pwstate = self.telnet_request(
-            telnet,
-            zone_commands.get("POWER").get("COMMAND"),
-            zone_commands.get("POWER").get("PREFIX"),
-        )
+        async with self._update_lock:
+            self._last_update_ts = time.monotonic()
+            try:
+                await self._async_update()
+            except (OSError, EOFError, TimeoutError):
+                _LOGGER.warning("Pioneer %s refused connection", self._name)
+
+    def _apply_pwr(self, pwstate: bytes | None) -> None:
+        """Apply a power status line."""
         if pwstate:
             self._pwstate = pwstate
 
-        volume_str = self.telnet_request(
-            telnet,
-            zone_commands.get("VOL").get("COMMAND"),
-            zone_commands.get("VOL").get("PREFIX"),
-        )
-        self._volume = float(volume_str[3:]) / MAX_VOLUME if volume_str else None
-
-        muted_value = self.telnet_request(
-            telnet,
-            zone_commands.get("MUTE").get("COMMAND"),
-            zone_commands.get("MUTE").get("PREFIX"),
-        )
-        self._muted = (
-            (muted_value == zone_commands["MUTED_VALUE"].get("COMMAND"))
-            if muted_value
-            else None
-        )
+    def _apply_vol(self, volume_str: bytes | None) -> None:
+        """Apply a volume status line."""
+        # Always three ASCII digits, which int() parses straight from bytes
+        self._volume_raw = int(volume_str[3:6]) if volume_str else None
 
-        # Build the source name dictionaries if necessary
-        if not self._source_name_to_number:
-            for i in range(MAX_SOURCE_NUMBERS):
-                result = self.telnet_request(telnet, f"?RGB{str(i).zfill(2)}", "RGB")
+    def _apply_mute(self, muted_value: bytes | None) -> None:
+        """Apply a mute status line."""
+        self._muted = (muted_value == self._muted_sentinel) if muted_value else None
 
-                if not result:
-                    continue
+    def _apply_fn(self, source_number: bytes | None) -> None:
+        """Apply a source status line."""
+        if source_number:
+            source_name = self._source_number_to_name.get(source_number[2:])
+            self._selected_source = (
+                source_name if source_name in self._source_name_to_number else None
+            )
+        else:
+            self._selected_source = None
 
-                source_name = result[6:]
-                source_number = str(i).zfill(2)
+    @callback
+    def _async_apply(self, field: str, line: bytes | None) -> None:
+        """Cache a status line for `field` and update the state from it."""
+        if line is None:
+            self._cache.pop(field, None)
+        else:
+            self._cache[field] = (time.monotonic(), line)
+        self._appliers[field](line)
 
-                self._source_name_to_number[source_name] = source_number
-                self._source_number_to_name[source_number] = source_name
+    @callback
+    def _async_handle_push(self, field: str, line: bytes) -> None:
+        """Apply a status line the receiver sent, solicited or not."""
+        self._async_apply(field, line)
+        self.async_write_ha_state()
 
-        source_number = self.telnet_request(
-            telnet,
-            zone_commands.get("SOURCE_NUM").get("COMMAND"),
-            zone_commands.get("SOURCE_NUM").get("PREFIX"),
+    async def _async_update(self) -> None:
+        """Query any status the receiver has not reported recently."""
+        # Build the source name dictionaries if necessary
+        if not self._source_name_to_number:
+            sources = await self._connection.async_discover_sources()
+            self._source_name_to_number.update(sources)
+            self._source_number_to_name.update(
+                {v.encode("ASCII"): k for k, v in sources.items()}
+            )
+            self._source_list = list(self._source_name_to_number)
+            if sources and self._entry is not None:
+                # Persist so later restarts can skip discovery
+                self.hass.config_entries.async_update_entry(
+                    self._entry,
+                    data={**self._entry.data, CONF_DISCOVERED_SOURCES: sources},
+                )
+
+        now = time.monotonic()
+        stale = [
+            key
+            for key in STATUS_QUERIES
+            if now - self._cache.get(key, (float("-inf"), None))[0] >= CACHE_TTL
+        ]
+        if not stale:
+            return
+        responses = await self._connection.async_query(
+            {self._field_to_prefix[key]: self._bcmd[key] for key in stale}
         )
+        for key in stale:
+            self._async_apply(key, responses.get(self._field_to_prefix[key]))
+
+    @callback
+    def _async_schedule_poll(self, delay: float) -> None:
+        """Schedule the next poll `delay` seconds from now."""
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+        if self._removed:
+            return
+        self._poll_interval = delay
+        self._unsub_poll = async_call_later(self.hass, delay, self._async_poll)
+
+    async def _async_poll(self, _: datetime) -> None:
+        """Poll the device and pick the next interval from whether it changed."""
+        self._unsub_poll = None
+        previous = (self._pwstate, self._volume_raw, self._muted, self._selected_source)
+        delay = min(self._poll_interval * 2, MAX_POLL_INTERVAL)
+        try:
+            await self.async_update()
+            if previous != (
+                self._pwstate,
+                self._volume_raw,
+                self._muted,
+                self._selected_source,
+            ):
+                self.async_write_ha_state()
+                delay = MIN_POLL_INTERVAL
+        finally:
+            # Keep polling even if the update raised, unless a command already
+            # rescheduled it or the entity was removed meanwhile
+            if self._unsub_poll is None:
+                self._async_schedule_poll(delay)
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for status lines and start polling once the entity is added."""
+        for field, prefix in self._field_to_prefix.items():
+            self.async_on_remove(
+                self._connection.register_listener(
+                    prefix, partial(self._async_handle_push, field)
+                )
+            )
+        self._async_schedule_poll(MIN_POLL_INTERVAL)
 
-        if source_number:
-            self._selected_source = self._source_number_to_name.get(source_number[2:])
-        else:
-            self._selected_source = None
-
-        telnet.close()
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop polling when the entity is removed."""
+        self._removed = True
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
 
     @property
     def name(self) -> str:
@@ -204,19 +305,21 @@ class PioneerDevice(MediaPlayerEntity):
     @property
     def state(self) -> MediaPlayerState | None:
         """Return the state of the device."""
-        if self._pwstate == "PWR2":
+        if self._pwstate == b"PWR2":
             return MediaPlayerState.OFF
-        if self._pwstate == "PWR1":
+        if self._pwstate == b"PWR1":
             return MediaPlayerState.OFF
-        if self._pwstate == "PWR0":
+        if self._pwstate == b"PWR0":
             return MediaPlayerState.ON
 
         return None
 
     @property
-    def volume_level(self) -> int:
+    def volume_level(self) -> float | None:
         """Volume level of the media player (0..1)."""
-        return self._volume
+        if self._volume_raw is None:
+            return None
+        return self._volume_raw / MAX_VOLUME
 
     @property
     def is_volume_muted(self) -> bool:
@@ -231,52 +334,68 @@ class PioneerDevice(MediaPlayerEntity):
     @property
     def source_list(self) -> list[str] | None:
         """List of available input sources."""
-        return list(self._source_name_to_number)
+        return self._source_list
 
     @property
     def media_title(self) -> str | None:
         """Title of current playing media."""
         return self._selected_source
 
-    def turn_off(self) -> None:
+    async def async_turn_off(self) -> None:
         """Turn off media player."""
-        self.telnet_command(
-            ZONE_COMMANDS.get(self._zone).get("TURN_OFF").get("COMMAND")
-        )
+        if not await self.async_send_command(self._bcmd["TURN_OFF"]):
+            return
+        self._cache.pop("POWER", None)
+        self._pwstate = b"PWR1"
+        self.async_write_ha_state()
 
-    def volume_up(self) -> None:
+    async def async_volume_up(self) -> None:
         """Volume up media player."""
-        self.telnet_command(ZONE_COMMANDS.get(self._zone).get("VOL_UP").get("COMMAND"))
+        await self.async_send_command(self._bcmd["VOL_UP"])
+        self._cache.pop("VOL", None)
 
-    def volume_down(self) -> None:
+    async def async_volume_down(self) -> None:
         """Volume down media player."""
-        self.telnet_command(
-            ZONE_COMMANDS.get(self._zone).get("VOL_DOWN").get("COMMAND")
-        )
+        await self.async_send_command(self._bcmd["VOL_DOWN"])
+        self._cache.pop("VOL", None)
 
-    def set_volume_level(self, volume: float) -> None:
+    async def async_set_volume_level(self, volume: float) -> None:
         """Set volume level, range 0..1."""
         # 60dB max
-        vol_command = ZONE_COMMANDS.get(self._zone).get("VOL_LEVEL").get("COMMAND")
-        self.telnet_command(f"{round(volume * MAX_VOLUME):03}{vol_command}")
+        volume_raw = round(volume * MAX_VOLUME)
+        if not await self.async_send_command(
+            f"{volume_raw:03}".encode("ASCII") + self._bcmd["VOL_LEVEL"]
+        ):
+            return
+        self._cache.pop("VOL", None)
+        self._volume_raw = volume_raw
+        self.async_write_ha_state()
 
-    def mute_volume(self, mute: bool) -> None:
+    async def async_mute_volume(self, mute: bool) -> None:
         """Mute (true) or unmute (false) media player."""
-        self.telnet_command(
-            ZONE_COMMANDS.get(self._zone).get("UNMUTE_VOL").get("COMMAND")
-            if mute
-            else ZONE_COMMANDS.get(self._zone).get("MUTE_VOL").get("COMMAND")
-        )
+        if not await self.async_send_command(
+            self._bcmd["UNMUTE_VOL"] if mute else self._bcmd["MUTE_VOL"]
+        ):
+            return
+        self._cache.pop("MUTE", None)
+        self._muted = mute
+        self.async_write_ha_state()
 
-    def turn_on(self) -> None:
+    async def async_turn_on(self) -> None:
         """Turn the media player on."""
-        self.telnet_command(ZONE_COMMANDS.get(self._zone).get("TURN_ON").get("COMMAND"))
+        if not await self.async_send_command(self._bcmd["TURN_ON"]):
+            return
+        self._cache.pop("POWER", None)
+        self._pwstate = b"PWR0"
+        self.async_write_ha_state()
 
-    def select_source(self, source: str) -> None:
+    async def async_select_source(self, source: str) -> None:
         """Select input source."""
-        source_command = (
-            ZONE_COMMANDS.get(self._zone).get("SELECT_SOURCE").get("COMMAND")
-        )
-        self.telnet_command(
-            f"{self._source_name_to_number.get(source)}{source_command}"
-        )
+        if not await self.async_send_command(
+            f"{self._source_name_to_number.get(source)}".encode("ASCII")
+            + self._bcmd["SELECT_SOURCE"]
+        ):
+            return
+        self._cache.pop("SOURCE_NUM", None)
+        self._selected_source = source
+        self.async_write_ha_state()
@@ -0,0 +1,61 @@
+"""Fakes shared by the Pioneer tests."""
+
+from __future__ import annotations
+
+import asyncio
+
+RESPONSES = {
+    b"?P": b"PWR0",
+    b"?V": b"VOL100",
+    b"?M": b"MUT1",
+    b"?F": b"FN04",
+}
+
+
+class FakeHass:
+    """The task helpers PioneerConnection uses from Home Assistant."""
+
+    def async_create_task(self, target, name=None):
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+    def async_create_background_task(self, target, name):
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+
+class FakeReceiver:
+    """A local TCP server answering Pioneer status queries."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.received: list[bytes] = []
+        self.responses = dict(RESPONSES)
+        self.greeting = b""
+        self.close_after_reply = False
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        writer.write(self.greeting)
+        buffer = b""
+        while data := await reader.read(1024):
+            buffer += data
+            while b"\r" in buffer:
+                command, buffer = buffer.split(b"\r", 1)
+                self.received.append(command)
+                if command in self.responses:
+                    writer.write(self.responses[command] + b"\r\n")
+            await writer.drain()
+            if self.close_after_reply:
+                self.close_after_reply = False
+                break
+        writer.close()
@@ -0,0 +1,24 @@
+"""Fixtures for the Pioneer tests."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.pioneer.connection import PioneerConnection
+
+from .common import FakeHass, FakeReceiver
+
+
+@pytest.fixture
+async def receiver():
+    receiver = FakeReceiver()
+    yield receiver
+    await receiver.stop()
+
+
+@pytest.fixture
+async def connection(receiver: FakeReceiver):
+    port = await receiver.start()
+    connection = PioneerConnection(FakeHass(), "127.0.0.1", port, 5)
+    yield connection
+    await connection.async_close()
@@ -0,0 +1,83 @@
+"""Tests for the shared Pioneer AVR connection."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.pioneer.connection import PioneerConnection
+
+from .common import FakeReceiver
+
+
+async def test_pipelined_query(
+    receiver: FakeReceiver, connection: PioneerConnection
+) -> None:
+    """Queries from several zones go out together and all get answered."""
+    first, second = await asyncio.gather(
+        connection.async_query({b"PWR": b"?P\r", b"VOL": b"?V\r"}),
+        connection.async_query({b"MUT": b"?M\r", b"FN": b"?F\r"}),
+    )
+
+    expected = {b"PWR": b"PWR0", b"VOL": b"VOL100", b"MUT": b"MUT1", b"FN": b"FN04"}
+    assert first == expected
+    assert second == expected
+    assert receiver.connections == 1
+
+
+async def test_unsolicited_push_reaches_listener(
+    receiver: FakeReceiver, connection: PioneerConnection
+) -> None:
+    """Lines the receiver sends on its own are dispatched by prefix."""
+    receiver.greeting = b"VOL050\r\nMUT0\r\n"
+    pushed: asyncio.Queue[bytes] = asyncio.Queue()
+    connection.register_listener(b"VOL", pushed.put_nowait)
+
+    await connection.async_send(b"PO\r")
+
+    assert await asyncio.wait_for(pushed.get(), 1) == b"VOL050"
+    assert pushed.empty()
+
+
+async def test_reconnect_after_eof(
+    receiver: FakeReceiver, connection: PioneerConnection
+) -> None:
+    """A connection dropped by the receiver is reopened on the next query."""
+    receiver.close_after_reply = True
+
+    assert await connection.async_query({b"PWR": b"?P\r"}) == {b"PWR": b"PWR0"}
+    # Let the reader task see the EOF
+    await asyncio.sleep(0.1)
+
+    assert await connection.async_query({b"VOL": b"?V\r"}) == {b"VOL": b"VOL100"}
+    assert receiver.connections == 2
+
+
+async def test_malformed_line_does_not_stop_reader(
+    receiver: FakeReceiver, connection: PioneerConnection
+) -> None:
+    """A listener failing on one line leaves the session usable."""
+    receiver.greeting = b"VOLxyz\r\n"
+    volumes: list[int] = []
+    connection.register_listener(b"VOL", lambda line: volumes.append(int(line[3:])))
+
+    await connection.async_send(b"PO\r")
+    await asyncio.sleep(0.1)
+
+    assert await connection.async_query({b"VOL": b"?V\r"}) == {b"VOL": b"VOL100"}
+    assert volumes == [100]
+    assert receiver.connections == 1
+
+
+async def test_close_fails_queued_query(
+    receiver: FakeReceiver, connection: PioneerConnection
+) -> None:
+    """Closing before a queued query is flushed fails it instead of hanging."""
+    query = asyncio.create_task(connection.async_query({b"PWR": b"?P\r"}))
+    await asyncio.sleep(0)
+    await connection.async_close()
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(query, 1)
+    assert receiver.connections == 0
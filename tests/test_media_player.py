@@ -0,0 +1,184 @@
+"""Tests for the Pioneer media player entity."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import Mock
+
+from homeassistant.components.media_player import MediaPlayerState
+import pytest
+
+from custom_components.pioneer import media_player
+from custom_components.pioneer.connection import PioneerConnection
+from custom_components.pioneer.const import MAX_VOLUME
+from custom_components.pioneer.media_player import (
+    CACHE_TTL,
+    MAX_POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    UPDATE_SHARE_WINDOW,
+    PioneerDevice,
+)
+
+from .common import FakeHass, FakeReceiver
+
+STATUS_QUERIES = [b"?P", b"?V", b"?M", b"?F"]
+
+
+@pytest.fixture
+def poll_delays(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Record the delay of every poll the entity schedules."""
+    delays: list[float] = []
+
+    def call_later(hass, delay, action):
+        delays.append(delay)
+        return Mock()
+
+    monkeypatch.setattr(media_player, "async_call_later", call_later)
+    return delays
+
+
+@pytest.fixture
+def device(connection: PioneerConnection, poll_delays: list[float]) -> PioneerDevice:
+    device = PioneerDevice("Pioneer", connection, ["CD", "DVD"])
+    device.hass = FakeHass()
+    device.async_write_ha_state = Mock()
+    return device
+
+
+def _age_cache(device: PioneerDevice, seconds: float) -> None:
+    """Make every cached status line `seconds` older."""
+    device._cache = {
+        field: (ts - seconds, line) for field, (ts, line) in device._cache.items()
+    }
+
+
+async def test_update_reuses_fresh_status(
+    receiver: FakeReceiver, device: PioneerDevice
+) -> None:
+    """Status answered less than CACHE_TTL ago is not queried again."""
+    await device.async_update()
+    assert receiver.received == STATUS_QUERIES
+    assert device.state == MediaPlayerState.ON
+    assert device.volume_level == 100 / MAX_VOLUME
+    assert device.source == "DVD"
+
+    await device.async_update()
+    assert receiver.received == STATUS_QUERIES
+
+
+async def test_update_requeries_expired_status(
+    receiver: FakeReceiver, device: PioneerDevice
+) -> None:
+    """Status older than CACHE_TTL is queried again."""
+    await device.async_update()
+    receiver.received.clear()
+    receiver.responses[b"?V"] = b"VOL050"
+    _age_cache(device, CACHE_TTL)
+
+    await device.async_update()
+    assert receiver.received == STATUS_QUERIES
+    assert device.volume_level == 50 / MAX_VOLUME
+
+
+async def test_command_invalidates_cached_status(
+    receiver: FakeReceiver, device: PioneerDevice
+) -> None:
+    """A command drops the cached status it affects, and only that."""
+    await device.async_update()
+    receiver.received.clear()
+
+    await device.async_set_volume_level(0.5)
+    assert device.volume_level == 92 / MAX_VOLUME
+    device.async_write_ha_state.assert_called_once()
+
+    await device.async_update()
+    assert receiver.received == [b"092VL", b"?V"]
+
+
+async def test_failed_command_keeps_state(
+    connection: PioneerConnection, device: PioneerDevice
+) -> None:
+    """No optimistic state is shown for a command that was not sent."""
+    await device.async_update()
+    await connection.async_close()
+
+    await device.async_mute_volume(True)
+    await device.async_turn_off()
+    await device.async_select_source("CD")
+
+    assert device.is_volume_muted is False
+    assert device.state == MediaPlayerState.ON
+    assert device.source == "DVD"
+    device.async_write_ha_state.assert_not_called()
+
+
+async def test_poll_backs_off_while_idle(
+    device: PioneerDevice, poll_delays: list[float]
+) -> None:
+    """The poll interval doubles while nothing changes, up to the maximum."""
+    await device.async_update()
+    device._async_schedule_poll(MIN_POLL_INTERVAL)
+    for _ in range(7):
+        await device._async_poll(None)
+
+    assert poll_delays == [1, 2, 4, 8, 16, 32, 60, 60]
+    assert poll_delays[-1] == MAX_POLL_INTERVAL
+    device.async_write_ha_state.assert_not_called()
+
+
+async def test_poll_resets_on_change(
+    receiver: FakeReceiver, device: PioneerDevice, poll_delays: list[float]
+) -> None:
+    """A poll that sees a change goes back to the shortest interval."""
+    await device.async_update()
+    device._async_schedule_poll(MIN_POLL_INTERVAL)
+    for _ in range(3):
+        await device._async_poll(None)
+    receiver.responses[b"?M"] = b"MUT0"
+    _age_cache(device, CACHE_TTL)
+
+    await device._async_poll(None)
+
+    assert poll_delays == [1, 2, 4, 8, MIN_POLL_INTERVAL]
+    assert device.is_volume_muted is True
+    device.async_write_ha_state.assert_called_once()
+
+
+async def test_poll_resets_on_command(
+    device: PioneerDevice, poll_delays: list[float]
+) -> None:
+    """Sending a command goes back to the shortest interval."""
+    await device.async_update()
+    device._async_schedule_poll(MIN_POLL_INTERVAL)
+    for _ in range(3):
+        await device._async_poll(None)
+
+    await device.async_volume_up()
+
+    assert poll_delays == [1, 2, 4, 8, MIN_POLL_INTERVAL]
+
+
+async def test_update_in_flight_is_shared(
+    receiver: FakeReceiver, device: PioneerDevice
+) -> None:
+    """An update started while a recent one is running returns at once."""
+    first = asyncio.create_task(device.async_update())
+    await asyncio.sleep(0)
+
+    await device.async_update()
+    assert not first.done()
+
+    await first
+    assert receiver.received == STATUS_QUERIES
+
+
+async def test_stale_update_in_flight_is_waited_for(
+    receiver: FakeReceiver, device: PioneerDevice
+) -> None:
+    """An update running for longer than the share window is waited for."""
+    first = asyncio.create_task(device.async_update())
+    await asyncio.sleep(0)
+    device._last_update_ts -= UPDATE_SHARE_WINDOW
+
+    await device.async_update()
+    assert first.done()
+    assert receiver.received == STATUS_QUERIES